@@ -0,0 +1,72 @@
+/* =====================================================================
+   FILE: sql/04_tvp_legtrips_stage.sql
+   PURPOSE:
+     - Table type + merge proc for the TVP staging path (USE_TVP=1)
+     - Python binds one whole batch of clean rows as a single
+       table-valued parameter; the proc runs the same dedup insert
+       (INSERT ... WHERE NOT EXISTS) as the temp-table path
+
+   NOTES:
+     - Column list and order must match the `cols` list in
+       src/transform_incremental_clean.py exactly
+     - row_hash is the raw SHA2_256 digest; Python binds it directly
+       as varbinary(32), same as the temp-table path
+   ===================================================================== */
+
+IF TYPE_ID('mobility.LegTripStage') IS NULL
+    CREATE TYPE mobility.LegTripStage AS TABLE (
+        row_hash               varbinary(32) NOT NULL,
+        user_trip_id           nvarchar(100) NOT NULL,
+
+        trip_date              date          NOT NULL,
+        start_time_utc         datetime2(3)  NULL,
+        end_time_utc           datetime2(3)  NULL,
+
+        start_longitude        float         NULL,
+        start_latitude         float         NULL,
+        end_longitude          float         NULL,
+        end_latitude           float         NULL,
+
+        service_name           nvarchar(200) NULL,
+        route_short_name       nvarchar(50)  NULL,
+        mode                   nvarchar(50)  NULL,
+        start_stop_name        nvarchar(200) NULL,
+        end_stop_name          nvarchar(200) NULL,
+
+        source_file            nvarchar(300) NULL,
+        file_date_raw          nvarchar(50)  NULL,
+
+        manhattan_distance_mi  float         NULL,
+        euclidean_distance_mi  float         NULL,
+
+        Origin_BG              varchar(12)   NULL,
+        Dest_BG                varchar(12)   NULL
+    );
+GO
+
+CREATE OR ALTER PROCEDURE mobility.usp_Merge_LegTrips
+    @rows mobility.LegTripStage READONLY
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    INSERT INTO mobility.LegTrips_Clean (
+        row_hash, user_trip_id, trip_date, start_time_utc, end_time_utc,
+        start_longitude, start_latitude, end_longitude, end_latitude,
+        service_name, route_short_name, mode, start_stop_name, end_stop_name,
+        source_file, file_date_raw, manhattan_distance_mi, euclidean_distance_mi,
+        Origin_BG, Dest_BG
+    )
+    SELECT
+        src.row_hash,
+        src.user_trip_id, src.trip_date, src.start_time_utc, src.end_time_utc,
+        src.start_longitude, src.start_latitude, src.end_longitude, src.end_latitude,
+        src.service_name, src.route_short_name, src.mode, src.start_stop_name, src.end_stop_name,
+        src.source_file, src.file_date_raw, src.manhattan_distance_mi, src.euclidean_distance_mi,
+        src.Origin_BG, src.Dest_BG
+    FROM @rows AS src
+    WHERE NOT EXISTS (
+        SELECT 1 FROM mobility.LegTrips_Clean c WHERE c.row_hash = src.row_hash
+    );
+END
+GO
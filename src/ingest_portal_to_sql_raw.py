@@ -19,20 +19,38 @@ Public-safe notes
 from __future__ import annotations
 
 import os
-import io
 import re
+import csv
+import math
 import getpass
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
 from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyproj
+import shapely
 import geopandas as gpd
-from bs4 import BeautifulSoup
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.exc import SQLAlchemyError
 
+# numba is optional (e.g. not present in every ArcGIS Pro env); the distance
+# math falls back to plain NumPy ufuncs when it is missing.
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
 
 # -----------------------
 # Configuration
@@ -56,6 +74,7 @@ class IngestConfig:
     sql_database: str = ""
     odbc_driver: str = "ODBC Driver 17 for SQL Server"
     target_table: str = "mobility.raw_leg_trips"  # <--- your choice
+    use_bulkcopy: bool = False  # route inserts through bcp.exe instead of executemany
 
 
 def load_config() -> IngestConfig:
@@ -76,6 +95,7 @@ def load_config() -> IngestConfig:
         sql_database=os.getenv("SQL_DATABASE", "").strip(),
         odbc_driver=os.getenv("ODBC_DRIVER", "ODBC Driver 17 for SQL Server").strip(),
         target_table=os.getenv("RAW_TABLE_NAME", "mobility.raw_leg_trips").strip(),
+        use_bulkcopy=os.getenv("USE_BULKCOPY_RAW", "0").strip() in ("1", "true", "yes"),
     )
 
     # optional years list: "2024,2025"
@@ -101,7 +121,18 @@ def build_engine(cfg: IngestConfig):
         f"?driver={cfg.odbc_driver.replace(' ', '+')}"
         "&trusted_connection=yes"
     )
-    return create_engine(engine_string, fast_executemany=True)
+    engine = create_engine(engine_string, fast_executemany=True)
+
+    # Belt-and-braces: force fast_executemany on every executemany cursor,
+    # including paths that bypass the dialect-level flag. With it enabled,
+    # pyodbc binds parameter arrays instead of issuing per-row sp_prepexec
+    # round-trips.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _enable_fast_executemany(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            cursor.fast_executemany = True
+
+    return engine
 
 
 def get_portal_session() -> requests.Session:
@@ -121,6 +152,19 @@ def get_portal_session() -> requests.Session:
 
     s = requests.Session()
     s.auth = (username, password)
+
+    # Pool keep-alive connections (the download pool runs up to 4 GETs at
+    # once) and retry transient portal hiccups with backoff. Asking for gzip
+    # cuts text CSV bytes on the wire ~5-10x; urllib3 decompresses
+    # transparently via the decode_content flag set in download_csv.
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.5),
+    )
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
     return s
 
 
@@ -130,12 +174,19 @@ def list_matching_files(cfg: IngestConfig, session: requests.Session) -> list[st
     """
     resp = session.get(cfg.listing_url, timeout=60)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+
+    # The portal serves a plain directory listing; a compiled regex over the
+    # raw bytes pulls the matching hrefs far faster than a full HTML parse
+    # and never decodes the page to str.
+    href_re = re.compile(
+        rb'href="([^"]+' + re.escape(cfg.file_suffix.encode()) + rb')"',
+        re.IGNORECASE,
+    )
 
     file_urls: list[str] = []
-    for link in soup.find_all("a", href=True):
-        href = link["href"]
-        if not (href.endswith(cfg.file_suffix) and cfg.filename_substring in href):
+    for raw_href in href_re.findall(resp.content):
+        href = raw_href.decode("utf-8", errors="ignore")
+        if cfg.filename_substring not in href:
             continue
 
         # optional year filter using YYYY-MM-DD in filename
@@ -151,133 +202,466 @@ def list_matching_files(cfg: IngestConfig, session: requests.Session) -> list[st
     return sorted(set(file_urls))
 
 
-def get_already_loaded_files(engine, target_table: str) -> set[str]:
+COORD_COLS = ["start_longitude", "start_latitude", "end_longitude", "end_latitude"]
+
+# filename pattern: tapped_trip_view_legs_YYYY-MM-DD.csv
+FILE_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def download_csv(session: requests.Session, url: str) -> pd.DataFrame:
     """
-    If table exists, pull distinct source_file values to support incremental loads.
+    Stream a portal CSV straight into pyarrow's multi-threaded reader.
+
+    Parsing the raw byte stream avoids the full bytes->str decode that
+    io.StringIO(r.text) forced, halving peak memory per file, and the Arrow
+    reader parallelizes across cores. Coordinate columns are read as text
+    and coerced to float afterwards: declaring them float64 would make the
+    reader raise ArrowInvalid on a single malformed cell, and because the
+    HTTP stream is consumed by the parse there is no retrying the file with
+    a looser schema.
+
+    source_file and file_date are appended as run-length columns while the
+    data is still an immutable Arrow table; appending there is O(1) per
+    column, whereas adding them after to_pandas risks a BlockManager
+    consolidation copy of the whole frame.
     """
-    inspector = inspect(engine)
+    read_options = pacsv.ReadOptions(block_size=8 << 20, use_threads=True)
+    convert_options = pacsv.ConvertOptions(
+        column_types={
+            # coordinates come back as text and go through to_numeric
+            # below - a float64 declaration here would abort the whole
+            # file on one bad cell
+            **{c: pa.string() for c in COORD_COLS},
+            # keep the leg timestamps as raw text: Arrow would otherwise
+            # infer them as timestamps, and their stored rendering feeds
+            # the row-hash contract in the transform module
+            "start_time": pa.string(),
+            "end_time": pa.string(),
+        }
+    )
+
+    with session.get(url, stream=True, timeout=120) as r:
+        r.raise_for_status()
+        # make urllib3 hand us decompressed bytes if the portal gzips
+        r.raw.decode_content = True
+        table = pacsv.read_csv(
+            r.raw, read_options=read_options, convert_options=convert_options
+        )
+
+    fname = url.split("/")[-1]
+
+    # one date per file: validate the filename up front and build a single
+    # timestamp scalar rather than letting errors="coerce" broadcast NaT
+    # into every row of a misnamed file
+    m = FILE_DATE_RE.search(fname)
+    if m is None:
+        raise ValueError(f"Cannot parse file date from filename: {fname}")
+    file_date = pd.Timestamp(m.group(1)).to_pydatetime()
+
+    n = len(table)
+    table = table.append_column(
+        "source_file", pa.repeat(pa.scalar(fname, type=pa.string()), n)
+    )
+    table = table.append_column(
+        "file_date", pa.repeat(pa.scalar(file_date, type=pa.timestamp("ns")), n)
+    )
+
+    df = table.to_pandas()
+    # bad cells become NaN instead of failing the parse for the whole file
+    for c in COORD_COLS:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+def _split_schema_table(target_table: str) -> tuple[str | None, str]:
     # SQLAlchemy's has_table doesn't accept schema.table; split it.
     if "." in target_table:
         schema, table = target_table.split(".", 1)
-    else:
-        schema, table = None, target_table
+        return schema, table
+    return None, target_table
+
+
+def _table_exists(engine, target_table: str) -> bool:
+    schema, table = _split_schema_table(target_table)
+    return inspect(engine).has_table(table_name=table, schema=schema)
+
+
+def ensure_loaded_files_table(engine, target_table: str) -> None:
+    """
+    Create (and backfill once) the sidecar tracking table {target}_loaded.
+
+    Tracking loaded filenames in a tiny keyed table turns the incremental
+    check from a full scan + DISTINCT over the ever-growing raw table into
+    an O(files) read. A nonclustered index on raw.source_file is added as a
+    backstop so any legacy DISTINCT query stays an index scan.
+    """
+    loaded_table = f"{target_table}_loaded"
+    _, raw_name = _split_schema_table(target_table)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"""
+        IF OBJECT_ID('{loaded_table}', 'U') IS NULL
+            CREATE TABLE {loaded_table} (
+                source_file nvarchar(300) NOT NULL PRIMARY KEY,
+                loaded_at   datetime2(3)  NOT NULL
+            );
+        """)
+
+        if _table_exists(engine, target_table):
+            # one-time backfill for histories loaded before the sidecar
+            # existed - only while the sidecar is empty, so routine runs
+            # never pay the O(rows) DISTINCT scan of the raw table again
+            sidecar_empty = conn.exec_driver_sql(
+                f"SELECT CASE WHEN EXISTS (SELECT 1 FROM {loaded_table}) THEN 0 ELSE 1 END"
+            ).scalar()
+            if sidecar_empty:
+                conn.exec_driver_sql(f"""
+                INSERT INTO {loaded_table} (source_file, loaded_at)
+                SELECT DISTINCT r.source_file, SYSUTCDATETIME()
+                FROM {target_table} r
+                WHERE r.source_file IS NOT NULL;
+                """)
+            conn.exec_driver_sql(f"""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = 'IX_{raw_name}_source_file'
+                  AND object_id = OBJECT_ID('{target_table}')
+            )
+                CREATE INDEX IX_{raw_name}_source_file ON {target_table} (source_file);
+            """)
+
+
+def _record_loaded_files(conn, target_table: str, df: pd.DataFrame) -> None:
+    """
+    Register the file(s) in df as loaded, inside the caller's transaction.
+    """
+    for fname in df["source_file"].dropna().unique():
+        conn.exec_driver_sql(
+            f"INSERT INTO {target_table}_loaded (source_file, loaded_at) "
+            "VALUES (?, SYSUTCDATETIME())",
+            (str(fname),),
+        )
+
 
-    if not inspector.has_table(table_name=table, schema=schema):
+def get_already_loaded_files(engine, target_table: str) -> set[str]:
+    """
+    Pull loaded filenames from the sidecar table to support incremental loads.
+    """
+    loaded_table = f"{target_table}_loaded"
+    if not _table_exists(engine, loaded_table):
         return set()
 
-    query = f"SELECT DISTINCT source_file FROM {target_table}"
-    existing_df = pd.read_sql(query, engine)
+    existing_df = pd.read_sql(f"SELECT source_file FROM {loaded_table}", engine)
     return set(existing_df["source_file"].dropna().astype(str).tolist())
 
 
-def load_block_groups(cfg: IngestConfig) -> gpd.GeoDataFrame:
+# PROJ transformer construction is expensive; cache one per target EPSG so
+# repeated per-file calls reuse the same C-level pipeline.
+_TRANSFORMER_CACHE: dict[int, pyproj.Transformer] = {}
+
+
+def get_transformer(epsg: int) -> pyproj.Transformer:
+    tr = _TRANSFORMER_CACHE.get(epsg)
+    if tr is None:
+        tr = pyproj.Transformer.from_crs("EPSG:4326", f"EPSG:{epsg}", always_xy=True)
+        _TRANSFORMER_CACHE[epsg] = tr
+    return tr
+
+
+if HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _distance_kernel(sx, sy, ex, ey, scale, out_man, out_euc):
+        """
+        Single fused pass over projected coords: both distance outputs per
+        element, no intermediate dx/dy/abs/sqrt temporaries.
+        """
+        for i in prange(sx.shape[0]):
+            dx = ex[i] - sx[i]
+            dy = ey[i] - sy[i]
+            out_man[i] = (abs(dx) + abs(dy)) * scale
+            out_euc[i] = math.sqrt(dx * dx + dy * dy) * scale
+
+
+@dataclass
+class BlockGroupIndex:
+    """
+    Spatial index over the BG polygons, built once per run.
+
+    Bulk STRtree queries replace per-file gpd.sjoin calls: no GeoDataFrame
+    construction, no bounds computation, no pandas merges in the hot path.
+    """
+    tree: shapely.STRtree
+    bg_ids: np.ndarray
+    geoms: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.bg_ids)
+
+    def for_envelope(self, minx: float, miny: float, maxx: float, maxy: float) -> BlockGroupIndex:
+        """
+        Narrow the index to polygons whose bboxes intersect the envelope.
+
+        Daily single-city files cover a sliver of the statewide layer, so
+        the per-point within queries run against a far smaller tree.
+        """
+        candidates = self.tree.query(shapely.box(minx, miny, maxx, maxy))
+        if len(candidates) >= len(self.bg_ids):
+            return self
+
+        geoms = self.geoms[candidates]
+        return BlockGroupIndex(
+            tree=shapely.STRtree(geoms),
+            bg_ids=self.bg_ids[candidates],
+            geoms=geoms,
+        )
+
+    def lookup(self, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """
+        Return the BG id containing each point (pd.NA where none matches).
+        """
+        pts = shapely.points(lons, lats)
+        left_idx, right_idx = self.tree.query(pts, predicate="within")
+        out = np.full(len(pts), pd.NA, dtype=object)
+        out[left_idx] = self.bg_ids[right_idx]
+        return out
+
+
+def load_block_groups(cfg: IngestConfig) -> BlockGroupIndex:
     """
-    Load BG polygons once and standardize CRS for spatial join.
+    Load BG polygons once, standardize CRS, and build the spatial index.
+
+    The shapefile is converted to a sibling GeoParquet cache (already in
+    WGS84, id + geometry only) on first run; subsequent runs read the
+    parquet, which is roughly an order of magnitude faster than shapefile
+    I/O plus reprojection. Delete the cache after updating the shapefile.
     """
-    bg = gpd.read_file(cfg.bg_shp_path)
+    parquet_path = Path(cfg.bg_shp_path).with_suffix(".wgs84.parquet")
 
-    # normalize to WGS84
-    if bg.crs is None:
-        bg = bg.set_crs("EPSG:4326")
+    if parquet_path.exists():
+        bg = gpd.read_parquet(parquet_path, columns=[cfg.bg_id_field, "geometry"])
     else:
-        bg = bg.to_crs("EPSG:4326")
+        bg = gpd.read_file(cfg.bg_shp_path)
 
-    keep = [cfg.bg_id_field, "geometry"]
-    bg = bg[keep].copy()
-    return bg
+        # normalize to WGS84
+        if bg.crs is None:
+            bg = bg.set_crs("EPSG:4326")
+        else:
+            bg = bg.to_crs("EPSG:4326")
 
+        bg = bg[[cfg.bg_id_field, "geometry"]]
+        try:
+            bg.to_parquet(parquet_path)
+        except Exception as e:
+            print(f"[WARN] Could not write BG parquet cache: {e}")
+
+    geoms = np.asarray(bg.geometry.values)
+    return BlockGroupIndex(
+        tree=shapely.STRtree(geoms),
+        bg_ids=bg[cfg.bg_id_field].to_numpy(),
+        geoms=geoms,
+    )
 
-def enrich_file_dataframe(df: pd.DataFrame, fname: str, cfg: IngestConfig, bg_gdf: gpd.GeoDataFrame) -> pd.DataFrame:
+
+def enrich_file_dataframe(df: pd.DataFrame, fname: str, cfg: IngestConfig, bg_index: BlockGroupIndex) -> pd.DataFrame:
     """
     Add:
       - source_file, file_date
       - distance metrics (miles)
       - Origin_BG, Dest_BG
-    """
-    df = df.copy()
-
-    # basic metadata
-    df["source_file"] = fname
 
-    # infer file_date from filename pattern: tapped_trip_view_legs_YYYY-MM-DD.csv
-    date_str = fname.replace(cfg.filename_substring + "_", "").replace(cfg.file_suffix, "")
-    df["file_date"] = pd.to_datetime(date_str, errors="coerce")
+    Mutates and returns the frame it is given; the caller hands over a
+    freshly parsed frame it never reuses, so no defensive copy is made.
+    """
+    # source_file / file_date are appended by download_csv while the data is
+    # still an Arrow table
 
-    # coordinate cleaning
-    coord_cols = ["start_longitude", "start_latitude", "end_longitude", "end_latitude"]
-    for c in coord_cols:
+    # coordinate cleaning: columns already arrive as float64 from the parse
+    for c in COORD_COLS:
         if c not in df.columns:
             raise KeyError(f"Expected column '{c}' not found in CSV {fname}")
-        df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    df = df.dropna(subset=coord_cols).reset_index(drop=True)
+    df = df.dropna(subset=COORD_COLS).reset_index(drop=True)
     if df.empty:
         return df
 
     # distances in miles (project to meters then convert)
+    # Transform raw lon/lat arrays directly through PROJ; no GeoDataFrame /
+    # Shapely point objects are needed just to reproject coordinates.
     meters_to_miles = 1 / 1609.344
-
-    orig = gpd.GeoDataFrame(
-        df,
-        geometry=gpd.points_from_xy(df["start_longitude"], df["start_latitude"]),
-        crs="EPSG:4326",
-    ).to_crs(epsg=cfg.dist_crs_epsg)
-
-    dest = gpd.GeoDataFrame(
-        df,
-        geometry=gpd.points_from_xy(df["end_longitude"], df["end_latitude"]),
-        crs="EPSG:4326",
-    ).to_crs(epsg=cfg.dist_crs_epsg)
-
-    dx = dest.geometry.x.values - orig.geometry.x.values
-    dy = dest.geometry.y.values - orig.geometry.y.values
-
-    df["manhattan_distance_mi"] = (np.abs(dx) + np.abs(dy)) * meters_to_miles
-    df["euclidean_distance_mi"] = (np.sqrt(dx**2 + dy**2)) * meters_to_miles
-
-    # spatial joins for origin/destination BG
-    orig_pts = gpd.GeoDataFrame(
-        geometry=gpd.points_from_xy(df["start_longitude"], df["start_latitude"]),
-        crs="EPSG:4326",
+    transformer = get_transformer(cfg.dist_crs_epsg)
+
+    # materialize each coordinate array once; reused below for the BG lookups
+    start_lon = df["start_longitude"].to_numpy()
+    start_lat = df["start_latitude"].to_numpy()
+    end_lon = df["end_longitude"].to_numpy()
+    end_lat = df["end_latitude"].to_numpy()
+
+    sx, sy = transformer.transform(start_lon, start_lat)
+    ex, ey = transformer.transform(end_lon, end_lat)
+
+    # float32 is plenty for mile-scale distances and halves the bytes moved
+    # through the arithmetic and the SQL write
+    if HAVE_NUMBA:
+        out_man = np.empty(len(df), np.float32)
+        out_euc = np.empty(len(df), np.float32)
+        _distance_kernel(sx, sy, ex, ey, meters_to_miles, out_man, out_euc)
+        df["manhattan_distance_mi"] = out_man
+        df["euclidean_distance_mi"] = out_euc
+    else:
+        dx = (ex - sx).astype(np.float32, copy=False)
+        dy = (ey - sy).astype(np.float32, copy=False)
+        df["manhattan_distance_mi"] = ((np.abs(dx) + np.abs(dy)) * meters_to_miles).astype(np.float32)
+        df["euclidean_distance_mi"] = (np.hypot(dx, dy) * meters_to_miles).astype(np.float32)
+
+    # spatial lookups for origin/destination BG: prefilter the statewide
+    # index to this file's bounding box, then query the smaller tree
+    local_index = bg_index.for_envelope(
+        min(start_lon.min(), end_lon.min()),
+        min(start_lat.min(), end_lat.min()),
+        max(start_lon.max(), end_lon.max()),
+        max(start_lat.max(), end_lat.max()),
     )
-    orig_join = gpd.sjoin(orig_pts, bg_gdf, how="left", predicate="within").sort_index()
-    df["Origin_BG"] = orig_join[cfg.bg_id_field].astype("string").values
+    df["Origin_BG"] = local_index.lookup(start_lon, start_lat)
+    df["Dest_BG"] = local_index.lookup(end_lon, end_lat)
 
-    dest_pts = gpd.GeoDataFrame(
-        geometry=gpd.points_from_xy(df["end_longitude"], df["end_latitude"]),
-        crs="EPSG:4326",
-    )
-    dest_join = gpd.sjoin(dest_pts, bg_gdf, how="left", predicate="within").sort_index()
-    df["Dest_BG"] = dest_join[cfg.bg_id_field].astype("string").values
+    # BG ids repeat heavily (a few thousand distinct GEOIDs over millions of
+    # rows); categoricals keep one dictionary of strings plus int codes
+    # instead of a Python str object per row
+    for col in ["Origin_BG", "Dest_BG"]:
+        df[col] = df[col].astype("category")
 
     # normalize string-like columns (avoids pandas -> SQL oddities)
-    for col in ["Origin_BG", "Dest_BG", "source_file"]:
-        df[col] = df[col].astype("string")
+    df["source_file"] = df["source_file"].astype("string")
 
     return df
 
 
-def write_to_sql(df: pd.DataFrame, engine, target_table: str, chunksize: int = 5000) -> int:
+def write_to_sql(df: pd.DataFrame, engine, target_table: str, chunksize: int | None = None) -> int:
     """
     Append to SQL table. Table is created automatically if it does not exist.
+
+    Rows land in an empty heap staging table first, then move to the target
+    in one INSERT ... WITH (TABLOCK) SELECT. Both steps qualify for minimal
+    logging under SIMPLE/BULK_LOGGED recovery, unlike fully-logged row
+    appends straight into the target. Everything (staging, move, loaded-file
+    bookkeeping) runs in one transaction, so a failed file leaves no
+    partial rows behind.
+
+    The default executemany strategy is kept deliberately: with
+    fast_executemany enabled it streams parameter arrays in large batches,
+    whereas method="multi" would inline values into the statement and hit
+    SQL Server's ~2100-parameter limit at ~100 rows per round-trip.
     """
     if df.empty:
         return 0
 
+    if chunksize is None:
+        chunksize = int(os.getenv("SQL_WRITE_CHUNKSIZE", "50000"))
+
+    # split schema and name so pandas and the raw SQL below agree on the
+    # table identity (to_sql would otherwise create one bracketed
+    # [schema.table_stg] identifier in the login's default schema)
+    schema, target_name = _split_schema_table(target_table)
+    stg_name = f"{target_name}_stg"
+    stg_table = f"{schema}.{stg_name}" if schema else stg_name
+
+    # pyodbc cannot bind pandas Categoricals; expand them to strings at the
+    # last moment so the dictionary encoding still pays off upstream
+    cat_cols = df.select_dtypes(include="category").columns
+    if len(cat_cols):
+        df[cat_cols] = df[cat_cols].astype("string")
+
     try:
-        df.to_sql(
-            target_table,
-            con=engine,
-            if_exists="append",
-            index=False,
-            chunksize=chunksize,
-            method=None,  # default insert strategy
-        )
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"IF OBJECT_ID('{stg_table}', 'U') IS NOT NULL DROP TABLE {stg_table};"
+            )
+            df.to_sql(
+                stg_name,
+                con=conn,
+                schema=schema,
+                if_exists="append",
+                index=False,
+                chunksize=chunksize,
+                method=None,  # executemany path; see docstring
+            )
+            col_list = ", ".join(f"[{c}]" for c in df.columns)
+            conn.exec_driver_sql(f"""
+            IF OBJECT_ID('{target_table}', 'U') IS NULL
+                SELECT * INTO {target_table} FROM {stg_table};
+            ELSE
+                INSERT INTO {target_table} WITH (TABLOCK) ({col_list})
+                SELECT {col_list} FROM {stg_table};
+            """)
+            conn.exec_driver_sql(f"DROP TABLE {stg_table};")
+            _record_loaded_files(conn, target_table, df)
         return len(df)
     except SQLAlchemyError as e:
         raise RuntimeError(f"SQL write failed for table {target_table}: {e}") from e
 
 
+def write_to_sql_bulkcopy(df: pd.DataFrame, engine, cfg: IngestConfig) -> int:
+    """
+    Append via SQL Server's native bulk-load protocol (bcp.exe).
+
+    bcp streams rows over TDS without per-row statement parsing, which beats
+    even fast_executemany by a wide margin on large daily files. The target
+    table is pre-created through SQLAlchemy (empty to_sql append) so bcp
+    never has to infer types; column order follows the DataFrame.
+    """
+    if df.empty:
+        return 0
+
+    # ensure the destination table exists with the right columns; pass
+    # name/schema separately or to_sql creates a bracketed [schema.table]
+    # identifier in the default schema that bcp would never target
+    schema, table = _split_schema_table(cfg.target_table)
+    if not inspect(engine).has_table(table_name=table, schema=schema):
+        df.head(0).to_sql(table, con=engine, schema=schema, if_exists="append", index=False)
+
+    # bcp -c has no notion of CSV quoting: quoted fields load with their
+    # literal quotes, and an embedded tab or newline shifts every column
+    # after it. Scrub those characters out of the text columns and write
+    # the file unquoted.
+    df = df.copy(deep=False)
+    for c in df.columns:
+        if pd.api.types.is_object_dtype(df[c]) or pd.api.types.is_string_dtype(df[c]):
+            df[c] = df[c].astype("string").str.replace(r"[\t\r\n]", " ", regex=True)
+
+    tmp = tempfile.NamedTemporaryFile(
+        mode="w", suffix=".tsv", delete=False, encoding="utf-8", newline=""
+    )
+    try:
+        df.to_csv(
+            tmp, sep="\t", header=False, index=False, na_rep="",
+            quoting=csv.QUOTE_NONE,
+        )
+        tmp.close()
+
+        cmd = [
+            "bcp", cfg.target_table, "in", tmp.name,
+            "-S", cfg.sql_server,
+            "-d", cfg.sql_database,
+            "-T",            # trusted connection (matches build_engine)
+            "-c",            # character format
+            "-C", "65001",   # the temp file is UTF-8, not the client ANSI page
+            "-b", "50000",   # batch size
+            "-h", "TABLOCK", # minimally-logged bulk load
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"bcp load failed for table {cfg.target_table}: {result.stdout}\n{result.stderr}"
+            )
+
+        # bcp commits in its own session; record the files once it succeeds
+        with engine.begin() as conn:
+            _record_loaded_files(conn, cfg.target_table, df)
+        return len(df)
+    finally:
+        os.unlink(tmp.name)
+
+
 def run() -> int:
     cfg = load_config()
     engine = build_engine(cfg)
@@ -287,6 +671,7 @@ def run() -> int:
     file_urls = list_matching_files(cfg, session)
     print(f"[INFO] Found {len(file_urls)} matching CSV files.")
 
+    ensure_loaded_files_table(engine, cfg.target_table)
     existing_files = get_already_loaded_files(engine, cfg.target_table)
     print(f"[INFO] Already loaded files: {len(existing_files)}")
 
@@ -302,32 +687,63 @@ def run() -> int:
         return 0
 
     print("[INFO] Loading block groups once...")
-    bg_gdf = load_block_groups(cfg)
-    print(f"[INFO] Block groups loaded: {len(bg_gdf)}")
+    bg_index = load_block_groups(cfg)
+    print(f"[INFO] Block groups loaded: {len(bg_index)}")
 
     total_inserted = 0
 
-    for url in new_urls:
-        fname = url.split("/")[-1]
-        print(f"\n[INFO] Processing: {fname}")
-
-        r = session.get(url, timeout=120)
-        r.raise_for_status()
-
-        try:
-            df = pd.read_csv(io.StringIO(r.text))
-        except Exception as e:
-            print(f"[WARN] Skipping {fname} (CSV parse failed): {e}")
-            continue
-
-        df2 = enrich_file_dataframe(df, fname, cfg, bg_gdf)
-        if df2.empty:
-            print("[WARN] No valid rows after cleaning/enrichment. Skipping.")
-            continue
-
-        inserted = write_to_sql(df2, engine, cfg.target_table)
-        total_inserted += inserted
-        print(f"[INFO] Inserted rows: {inserted:,} (running total: {total_inserted:,})")
+    # Pipeline the per-file work: downloads run ahead in a small thread pool,
+    # SQL writes run behind on a single worker, and the main thread enriches.
+    # Downloads, CSV parsing, and SQL I/O all release the GIL, so wall time
+    # approaches the slowest stage instead of the sum of all three.
+    download_prefetch = 3
+    urls = deque(new_urls)
+    pending: deque[tuple[str, Future]] = deque()
+    pending_write: Future | None = None
+
+    with ThreadPoolExecutor(max_workers=4) as dl_pool, \
+         ThreadPoolExecutor(max_workers=1) as sql_pool:
+
+        def submit_next_download() -> None:
+            if urls:
+                url = urls.popleft()
+                fname = url.split("/")[-1]
+                pending.append((fname, dl_pool.submit(download_csv, session, url)))
+
+        for _ in range(download_prefetch):
+            submit_next_download()
+
+        while pending:
+            fname, future = pending.popleft()
+            submit_next_download()
+            print(f"\n[INFO] Processing: {fname}")
+
+            try:
+                df = future.result()
+            except requests.RequestException:
+                raise
+            except Exception as e:
+                print(f"[WARN] Skipping {fname} (CSV parse failed): {e}")
+                continue
+
+            df2 = enrich_file_dataframe(df, fname, cfg, bg_index)
+            if df2.empty:
+                print("[WARN] No valid rows after cleaning/enrichment. Skipping.")
+                continue
+
+            # bound enriched frames in flight: settle the previous write
+            # before queueing the next, so at most two frames (one being
+            # written, one waiting) are ever resident
+            if pending_write is not None:
+                total_inserted += pending_write.result()
+
+            if cfg.use_bulkcopy:
+                pending_write = sql_pool.submit(write_to_sql_bulkcopy, df2, engine, cfg)
+            else:
+                pending_write = sql_pool.submit(write_to_sql, df2, engine, cfg.target_table)
+
+        if pending_write is not None:
+            total_inserted += pending_write.result()
 
     print(f"\n[INFO] Done. Total rows inserted this run: {total_inserted:,}")
     return total_inserted
@@ -4,7 +4,7 @@ publish_agol_overwrite.py
 Purpose
 -------
 Module 3 of the pipeline:
-  1) Copy materialized ArcGIS tables from Enterprise SDE -> Local FGDB staging
+  1) Copy materialized ArcGIS tables from Enterprise SDE -> in-memory staging
   2) Build local feature classes (lines + points) from XY fields
   3) Overwrite existing Hosted Feature Layers in ArcGIS Online via ArcGIS Pro publishing
 
@@ -25,6 +25,7 @@ from __future__ import annotations
 
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
 # ArcPy is only available in the ArcGIS Pro python environment
@@ -53,7 +54,7 @@ class PublishConfig:
     sde_tp_table: str
     sde_walk_table: str
 
-    # Local staging tables in FGDB
+    # Staging tables in the memory workspace
     tb_flows_local: str
     tb_tp_local: str
     tb_walk_local: str
@@ -99,10 +100,12 @@ def load_config() -> PublishConfig:
     fc_tp = os.path.join(gdb_path, os.getenv("FC_TP", "Transfer_Hotspots_ByDay_Route"))
     fc_walk_egress = os.path.join(gdb_path, os.getenv("FC_WALK_EGRESS", "Walk_Egress_ByDay"))
 
-    # local staging tables
-    tb_flows_local = os.path.join(gdb_path, os.getenv("TB_FLOWS_LOCAL", "_stg_Flows_R31"))
-    tb_tp_local = os.path.join(gdb_path, os.getenv("TB_TP_LOCAL", "_stg_TP_R31"))
-    tb_walk_local = os.path.join(gdb_path, os.getenv("TB_WALK_LOCAL", "_stg_WalkEgress_R31"))
+    # staging tables live in the memory workspace: the SDE rows only exist
+    # long enough to feed XYToLine/XYTableToPoint, so there is no reason to
+    # write them to the FGDB and read them straight back
+    tb_flows_local = os.path.join("memory", os.getenv("TB_FLOWS_LOCAL", "_stg_Flows_R31"))
+    tb_tp_local = os.path.join("memory", os.getenv("TB_TP_LOCAL", "_stg_TP_R31"))
+    tb_walk_local = os.path.join("memory", os.getenv("TB_WALK_LOCAL", "_stg_WalkEgress_R31"))
 
     # AGOL services
     agol_flow_service_name = os.getenv("AGOL_FLOW_SERVICE_NAME", "").strip()
@@ -154,14 +157,15 @@ def sde_path(cfg: PublishConfig, table_name: str) -> str:
     return os.path.join(cfg.sde_conn_path, table_name)
 
 
-def copy_sde_table_to_fgdb(sde_table: str, fgdb_table: str) -> str:
+def copy_sde_table_to_staging(sde_table: str, staging_table: str) -> str:
     """
-    Copy SDE table into local FGDB as a stable staging table.
+    Copy SDE table into the in-memory staging workspace.
+
+    env.overwriteOutput is set module-wide, so CopyRows replaces any
+    leftover staging table itself; no Exists/Delete round-trip needed.
     """
-    if arcpy.Exists(fgdb_table):
-        arcpy.management.Delete(fgdb_table)
-    arcpy.management.CopyRows(sde_table, fgdb_table)
-    return fgdb_table
+    arcpy.management.CopyRows(sde_table, staging_table)
+    return staging_table
 
 
 def rebuild_flows_fc(cfg: PublishConfig) -> str:
@@ -169,10 +173,7 @@ def rebuild_flows_fc(cfg: PublishConfig) -> str:
     Build a line feature class representing O-D flows using mean start/end coords.
     """
     sde_src = sde_path(cfg, cfg.sde_flows_table)
-    local_tbl = copy_sde_table_to_fgdb(sde_src, cfg.tb_flows_local)
-
-    if arcpy.Exists(cfg.fc_flows):
-        arcpy.management.Delete(cfg.fc_flows)
+    local_tbl = copy_sde_table_to_staging(sde_src, cfg.tb_flows_local)
 
     # ATTRIBUTES retains fields (including oid) from table in output lines
     arcpy.management.XYToLine(
@@ -186,7 +187,6 @@ def rebuild_flows_fc(cfg: PublishConfig) -> str:
         attributes="ATTRIBUTES",
         spatial_reference=SR_WGS84,
     )
-    arcpy.management.DefineProjection(cfg.fc_flows, SR_WGS84)
     return cfg.fc_flows
 
 
@@ -195,10 +195,7 @@ def rebuild_tp_fc(cfg: PublishConfig) -> str:
     Build a point feature class for transfer hotspots using mean lon/lat.
     """
     sde_src = sde_path(cfg, cfg.sde_tp_table)
-    local_tbl = copy_sde_table_to_fgdb(sde_src, cfg.tb_tp_local)
-
-    if arcpy.Exists(cfg.fc_tp):
-        arcpy.management.Delete(cfg.fc_tp)
+    local_tbl = copy_sde_table_to_staging(sde_src, cfg.tb_tp_local)
 
     arcpy.management.XYTableToPoint(
         in_table=local_tbl,
@@ -207,7 +204,6 @@ def rebuild_tp_fc(cfg: PublishConfig) -> str:
         y_field="mean_lat",
         coordinate_system=SR_WGS84,
     )
-    arcpy.management.DefineProjection(cfg.fc_tp, SR_WGS84)
     return cfg.fc_tp
 
 
@@ -216,10 +212,7 @@ def rebuild_walk_egress_fc(cfg: PublishConfig) -> str:
     Build a line feature class for egress walk legs using mean start/end coords.
     """
     sde_src = sde_path(cfg, cfg.sde_walk_table)
-    local_tbl = copy_sde_table_to_fgdb(sde_src, cfg.tb_walk_local)
-
-    if arcpy.Exists(cfg.fc_walk_egress):
-        arcpy.management.Delete(cfg.fc_walk_egress)
+    local_tbl = copy_sde_table_to_staging(sde_src, cfg.tb_walk_local)
 
     arcpy.management.XYToLine(
         in_table=local_tbl,
@@ -232,7 +225,6 @@ def rebuild_walk_egress_fc(cfg: PublishConfig) -> str:
         attributes="ATTRIBUTES",
         spatial_reference=SR_WGS84,
     )
-    arcpy.management.DefineProjection(cfg.fc_walk_egress, SR_WGS84)
     return cfg.fc_walk_egress
 
 
@@ -240,21 +232,18 @@ def rebuild_walk_egress_fc(cfg: PublishConfig) -> str:
 # Publishing helper: overwrite hosted layer
 # -----------------------------
 
-def overwrite_hosted_layer(cfg: PublishConfig, local_fc: str, service_name: str) -> None:
+def prepare_publish_map(cfg: PublishConfig, feature_classes: list[str]):
     """
-    Overwrite an existing hosted feature layer service in AGOL.
+    Open the APRX once, reset the map to exactly the given feature classes,
+    and save once.
 
-    Requirements:
-    - You must already be signed into ArcGIS Pro with an account that has permission
-      to overwrite the target hosted service.
-    - The hosted service must already exist (this is overwrite, not create).
+    Opening and saving a project is expensive (file I/O + project graph
+    rebuild); doing it per service tripled that cost. Returns the project,
+    the map, and the added layers in input order.
     """
-    if cfg.dry_run:
-        print(f"[DRY_RUN] Would overwrite hosted layer: {service_name} using {local_fc}")
-        return
-
-    if not arcpy.Exists(local_fc):
-        raise FileNotFoundError(f"Local feature class not found: {local_fc}")
+    for fc in feature_classes:
+        if not arcpy.Exists(fc):
+            raise FileNotFoundError(f"Local feature class not found: {fc}")
 
     aprx = arcpy.mp.ArcGISProject(cfg.aprx_path)
     maps = aprx.listMaps(cfg.map_name)
@@ -269,9 +258,24 @@ def overwrite_hosted_layer(cfg: PublishConfig, local_fc: str, service_name: str)
         except Exception:
             pass
 
-    mp.addDataFromPath(local_fc)
+    layers = [mp.addDataFromPath(fc) for fc in feature_classes]
     aprx.save()
+    return aprx, mp, layers
+
 
+def overwrite_hosted_layer(cfg: PublishConfig, mp, layer, service_name: str) -> None:
+    """
+    Overwrite an existing hosted feature layer service in AGOL.
+
+    Requirements:
+    - You must already be signed into ArcGIS Pro with an account that has permission
+      to overwrite the target hosted service.
+    - The hosted service must already exist (this is overwrite, not create).
+
+    The map is prepared (and the APRX saved) once by prepare_publish_map;
+    only the sddraft/stage/upload steps run per service, scoped to the
+    given layer so sibling layers in the map stay out of the service.
+    """
     sddraft_path = os.path.join(cfg.scratch_dir, f"{service_name}.sddraft")
     sd_path = os.path.join(cfg.scratch_dir, f"{service_name}.sd")
 
@@ -287,6 +291,7 @@ def overwrite_hosted_layer(cfg: PublishConfig, local_fc: str, service_name: str)
         server_type="HOSTING_SERVER",
         service_type="FEATURE",
         service_name=service_name,
+        layers_and_tables=[layer],
     )
     sharing_draft.overwriteExistingService = True
     sharing_draft.summary = "Auto-updated Rolling 31 Day mobility analytics (materialized tables -> hosted layers)."
@@ -309,15 +314,35 @@ def run() -> None:
     print("[INFO] Starting publish module (Module 3).")
     print("[INFO] DRY_RUN:", cfg.dry_run)
 
-    # Build local feature classes
-    flows_fc = rebuild_flows_fc(cfg)
-    tp_fc = rebuild_tp_fc(cfg)
-    walk_fc = rebuild_walk_egress_fc(cfg)
+    # Build local feature classes. The three rebuilds touch independent SDE
+    # tables, staging tables, and output FCs, and ArcPy releases the GIL
+    # inside native tool calls, so they can overlap in a small thread pool.
+    # The AGOL overwrites below stay serial (they share the same APRX map).
+    try:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [
+                pool.submit(fn, cfg)
+                for fn in (rebuild_flows_fc, rebuild_tp_fc, rebuild_walk_egress_fc)
+            ]
+            flows_fc, tp_fc, walk_fc = [f.result() for f in futures]
+    finally:
+        # release the staging rows held in RAM
+        arcpy.management.Delete("memory")
 
     # Overwrite hosted layers
-    overwrite_hosted_layer(cfg, flows_fc, cfg.agol_flow_service_name)
-    overwrite_hosted_layer(cfg, tp_fc, cfg.agol_tp_service_name)
-    overwrite_hosted_layer(cfg, walk_fc, cfg.agol_walk_egress_service_name)
+    services = [
+        (flows_fc, cfg.agol_flow_service_name),
+        (tp_fc, cfg.agol_tp_service_name),
+        (walk_fc, cfg.agol_walk_egress_service_name),
+    ]
+
+    if cfg.dry_run:
+        for fc, service_name in services:
+            print(f"[DRY_RUN] Would overwrite hosted layer: {service_name} using {fc}")
+    else:
+        aprx, mp, layers = prepare_publish_map(cfg, [fc for fc, _ in services])
+        for layer, (_, service_name) in zip(layers, services):
+            overwrite_hosted_layer(cfg, mp, layer, service_name)
 
     print("[INFO] Module 3 finished successfully.")
 
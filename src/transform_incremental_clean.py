@@ -19,18 +19,33 @@ Public-safe notes
 from __future__ import annotations
 
 import os
+import csv
 import json
-import math
 import hashlib
+import queue
+import subprocess
+import tempfile
+import threading
 import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import chain
 from pathlib import Path
 from typing import Any
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 import pyodbc
 
+# connectorx is optional: when present, raw fetches stream columnar Arrow
+# batches instead of building per-cell Python objects through pd.read_sql.
+try:
+    import connectorx as cx
+    HAVE_CONNECTORX = True
+except ImportError:
+    HAVE_CONNECTORX = False
+
 
 # -----------------------------
 # Configuration
@@ -59,6 +74,12 @@ class TransformConfig:
     proc_days_back: int = 31
     proc_region_prefix: str | None = None  # e.g., "48029" or None
 
+    # Staging strategy
+    use_bulkcopy: bool = False  # stage via bcp.exe instead of executemany
+    use_tvp: bool = False  # send batches as one table-valued parameter
+    sql_pushdown: bool = False  # hash + dedup server-side, no raw fetch
+    batch_size: int = 50_000  # rows per fast_executemany round trip
+
 
 def load_config() -> TransformConfig:
     state_path = Path(os.getenv("STATE_PATH", "state/state_mobility_incremental.json"))
@@ -82,6 +103,10 @@ def load_config() -> TransformConfig:
         refresh_proc=os.getenv("REFRESH_PROC", "mobility.usp_Refresh_Rolling31_Aggregates").strip(),
         proc_days_back=int(os.getenv("PROC_DAYS_BACK", "31")),
         proc_region_prefix=(os.getenv("PROC_REGION_PREFIX", "").strip() or None),
+        use_bulkcopy=os.getenv("USE_BULKCOPY_CLEAN", "0").strip() in ("1", "true", "yes"),
+        use_tvp=os.getenv("USE_TVP", "0").strip() in ("1", "true", "yes"),
+        sql_pushdown=os.getenv("SQL_PUSHDOWN", "0").strip() in ("1", "true", "yes"),
+        batch_size=int(os.getenv("BATCH_SIZE", "50000")),
     )
     return cfg
 
@@ -120,37 +145,37 @@ def connect_sql(cfg: TransformConfig) -> pyodbc.Connection:
     return cn
 
 
-def _sql_safe(v: Any) -> Any:
-    """
-    Convert pandas/numpy values into SQL-friendly Python types.
+def _sanitize_for_sql(df: pd.DataFrame) -> pd.DataFrame:
     """
-    if v is None:
-        return None
-
-    if isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
-        return None
-
-    if pd.isna(v):
-        return None
-
-    if isinstance(v, (np.integer,)):
-        return int(v)
+    Convert a DataFrame into SQL-friendly Python objects, column by column.
 
-    if isinstance(v, (np.floating,)):
-        fv = float(v)
-        if math.isnan(fv) or math.isinf(fv):
-            return None
-        return fv
-
-    if isinstance(v, pd.Timestamp):
-        py_dt = v.to_pydatetime()
-        # round down to milliseconds for datetime2(3)
-        return py_dt.replace(microsecond=(py_dt.microsecond // 1000) * 1000)
-
-    if isinstance(v, pd.Timedelta):
-        return v.total_seconds()
+    Replaces the old per-cell _sql_safe dispatch (six isinstance checks per
+    value, N*C Python calls per batch) with one vectorized pass per column.
+    Every cell in the returned object-dtype frame is a native Python scalar
+    or None, so staging can feed itertuples rows straight to pyodbc.
+    """
+    out = pd.DataFrame(index=df.index)
+
+    for col in df.columns:
+        s = df[col]
+
+        if pd.api.types.is_float_dtype(s):
+            s = s.replace([np.inf, -np.inf], np.nan).astype(object)
+            s = s.where(pd.notna(s), None)
+        elif pd.api.types.is_integer_dtype(s):
+            s = s.astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(s):
+            # round down to milliseconds for datetime2(3); Timestamp is a
+            # datetime subclass, so pyodbc binds it without the deprecated
+            # dt.to_pydatetime() round trip
+            floored = s.dt.floor("ms")
+            s = floored.astype(object).where(floored.notna(), None)
+        else:
+            s = s.astype(object).where(s.notna(), None)
+
+        out[col] = s
 
-    return v
+    return out
 
 
 # -----------------------------
@@ -170,17 +195,89 @@ def compute_since(last_file_dt: str | None, rolling_days: int, overlap_days: int
     return watermark - dt.timedelta(days=overlap_days)
 
 
-def fetch_new_raw(cn: pyodbc.Connection, cfg: TransformConfig, since: dt.datetime) -> pd.DataFrame:
+def _connectorx_url(cfg: TransformConfig) -> str:
+    return f"mssql://{cfg.sql_server}/{cfg.sql_database}?trusted_connection=true"
+
+
+def fetch_new_raw(
+    cn: pyodbc.Connection,
+    cfg: TransformConfig,
+    since: dt.datetime,
+    until: dt.datetime | None = None,
+) -> pd.DataFrame:
     """
-    Pull raw rows where file_date >= since.
+    Pull raw rows where since <= file_date < until (until defaults to
+    tomorrow, which makes the range closed and the index seek stable).
+
+    Numeric columns are projected through TRY_CAST so the driver hands
+    back native floats and Python never re-coerces them. start_time and
+    end_time stay exactly as stored: their raw rendering feeds the row
+    hash, and a server-side conversion would change it.
+
+    With connectorx installed, the result set streams as columnar Arrow
+    batches directly into contiguous buffers - no list-of-tuples and no
+    per-cell Python object allocation, typically several times faster with
+    about half the peak memory. Falls back to pd.read_sql on the existing
+    pyodbc connection otherwise. connectorx opens its own connection and
+    does not take bind parameters, so the watermarks are inlined as
+    datetime2 literals.
     """
-    sql = f"""
+    if until is None:
+        until = dt.datetime.now() + dt.timedelta(days=1)
+
+    sql = _raw_select_sql(cfg)
+    if HAVE_CONNECTORX:
+        return cx.read_sql(
+            _connectorx_url(cfg),
+            sql.format(
+                since=f"CONVERT(datetime2, '{since:%Y-%m-%d %H:%M:%S}', 120)",
+                until=f"CONVERT(datetime2, '{until:%Y-%m-%d %H:%M:%S}', 120)",
+            ),
+            return_type="pandas",
+        )
+
+    return pd.read_sql(sql.format(since="?", until="?"), cn, params=[since, until])
+
+
+def fetch_new_raw_chunks(
+    cn: pyodbc.Connection,
+    cfg: TransformConfig,
+    since: dt.datetime,
+    until: dt.datetime | None = None,
+    chunksize: int = 200_000,
+):
+    """
+    Yield the raw rows in DataFrame chunks so transform/hash/staging can
+    start while the server is still sending the rest of the result set.
+
+    The pyodbc path streams through pd.read_sql(chunksize=...), which
+    also caps resident memory at one chunk. connectorx has no
+    incremental iterator - it already lands the result set in compact
+    Arrow buffers - so that path yields the whole frame as one chunk.
+    """
+    if HAVE_CONNECTORX:
+        df = fetch_new_raw(cn, cfg, since, until)
+        if not df.empty:
+            yield df
+        return
+
+    if until is None:
+        until = dt.datetime.now() + dt.timedelta(days=1)
+
+    sql = _raw_select_sql(cfg).format(since="?", until="?")
+    yield from pd.read_sql(sql, cn, params=[since, until], chunksize=chunksize)
+
+
+def _raw_select_sql(cfg: TransformConfig) -> str:
+    return f"""
     SELECT
         user_trip_id,
         start_time,
         end_time,
-        start_longitude, start_latitude,
-        end_longitude, end_latitude,
+        TRY_CAST(start_longitude AS float) AS start_longitude,
+        TRY_CAST(start_latitude AS float) AS start_latitude,
+        TRY_CAST(end_longitude AS float) AS end_longitude,
+        TRY_CAST(end_latitude AS float) AS end_latitude,
         service_name,
         route_short_name,
         mode,
@@ -188,125 +285,344 @@ def fetch_new_raw(cn: pyodbc.Connection, cfg: TransformConfig, since: dt.datetim
         end_stop_name,
         source_file,
         file_date AS file_date_raw,
-        manhattan_distance_mi,
-        euclidean_distance_mi,
+        TRY_CAST(manhattan_distance_mi AS float) AS manhattan_distance_mi,
+        TRY_CAST(euclidean_distance_mi AS float) AS euclidean_distance_mi,
         Origin_BG,
         Dest_BG
     FROM {cfg.source_table}
-    WHERE file_date >= ?
+    WHERE file_date >= {{since}} AND file_date < {{until}}
     """
-    return pd.read_sql(sql, cn, params=[since])
 
 
 # -----------------------------
 # Transform / hashing
 # -----------------------------
 
-def sha256_rowhash(row: dict[str, Any]) -> str:
+# Field order and separator are part of the hash contract: changing either
+# invalidates every row_hash already stored in the clean table.
+HASH_COLS = [
+    "user_trip_id",
+    "start_time",
+    "end_time",
+    "start_longitude",
+    "start_latitude",
+    "end_longitude",
+    "end_latitude",
+    "service_name",
+    "route_short_name",
+    "mode",
+    "start_stop_name",
+    "end_stop_name",
+    "source_file",
+    "file_date_raw",
+    "Origin_BG",
+    "Dest_BG",
+]
+
+FLOAT_COLS = [
+    "start_longitude", "start_latitude", "end_longitude", "end_latitude",
+    "manhattan_distance_mi", "euclidean_distance_mi",
+]
+
+# Low-cardinality label columns: category dtype stores each distinct value
+# once plus compact integer codes (same convention as the ingest module's
+# block-group columns).
+CATEGORY_COLS = [
+    "service_name", "route_short_name", "mode", "start_stop_name", "end_stop_name",
+]
+
+# Clean-table column order; shared by clean_transform's output selection,
+# the staging DDL/INSERT, and the mobility.LegTripStage TVP type.
+CLEAN_COLS = [
+    "row_hash", "user_trip_id",
+    "trip_date", "start_time_utc", "end_time_utc",
+    "start_longitude", "start_latitude", "end_longitude", "end_latitude",
+    "service_name", "route_short_name", "mode", "start_stop_name", "end_stop_name",
+    "source_file", "file_date_raw",
+    "manhattan_distance_mi", "euclidean_distance_mi",
+    "Origin_BG", "Dest_BG",
+]
+
+# Below this, process startup costs more than the hashing it would save.
+_PARALLEL_HASH_MIN_ROWS = 50_000
+
+_hash_pool: ProcessPoolExecutor | None = None
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    # Lazy singleton: spawn startup (a full module re-import per worker on
+    # Windows) is paid once per run, not once per 200k-row chunk. The pool
+    # is reaped by the executor's own atexit hook.
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _hash_pool
+
+
+def _hash_chunk(encoded: np.ndarray) -> list[bytes]:
+    # module-level so worker processes can import it; raw 32-byte digests
+    # go straight to varbinary(32) binds - no hex round trip
+    sha256 = hashlib.sha256
+    return [sha256(b).digest() for b in encoded]
+
+
+def compute_row_hashes(df: pd.DataFrame) -> pd.Series:
     """
-    Deterministic hash used for insert-only upsert into clean table.
+    Deterministic per-row hash used for insert-only upsert into clean table.
     This lets us safely reprocess overlapping windows without duplicates.
+    Returns raw 32-byte digests, bound directly as varbinary(32) - hex
+    rendering would quadruple the wire bytes for this column and force a
+    per-row CONVERT in the MERGE.
+
+    The "col|col|..." strings are assembled column-wise with pandas'
+    C-level str.cat (nulls become "") and UTF-8 encoded in one vectorized
+    pass, so the loop below does nothing but hand ready bytes to hashlib.
+    OpenSSL dispatches sha256 to the CPU's SHA extensions where available;
+    with the Python-side prep hoisted out, that pipeline dominates.
+
+    A jitted assembly kernel was considered and rejected: the rows are
+    variable-length text, so numba would need a padded uint8 matrix built
+    by a Python copy pass that costs more than str.cat, and non-SHA
+    digests would break dedup against rows already in the clean table.
+
+    Hashing is per-row independent, so large batches are split across
+    physical cores with a ProcessPoolExecutor; small frames stay
+    single-process because worker startup would eat the gain.
     """
-    parts = [
-        str(row.get("user_trip_id") or ""),
-        str(row.get("start_time") or ""),
-        str(row.get("end_time") or ""),
-        str(row.get("start_longitude") or ""),
-        str(row.get("start_latitude") or ""),
-        str(row.get("end_longitude") or ""),
-        str(row.get("end_latitude") or ""),
-        str(row.get("service_name") or ""),
-        str(row.get("route_short_name") or ""),
-        str(row.get("mode") or ""),
-        str(row.get("start_stop_name") or ""),
-        str(row.get("end_stop_name") or ""),
-        str(row.get("source_file") or ""),
-        str(row.get("file_date_raw") or ""),
-        str(row.get("Origin_BG") or ""),
-        str(row.get("Dest_BG") or ""),
-    ]
-    s = "|".join(parts).encode("utf-8", errors="ignore")
-    return hashlib.sha256(s).hexdigest()
+    # Every branch must reproduce the baseline per-row str(v or "")
+    # rendering exactly - any divergence makes refetched overlap rows hash
+    # differently from their stored copies and re-admits them as dupes.
+    parts = []
+    for c in HASH_COLS:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # astype(str) on a categorical casts only the categories and
+            # gathers through the codes - each distinct label renders once
+            if "" not in s.cat.categories:
+                s = s.cat.add_categories([""])
+            s = s.fillna("").astype(str)
+        elif pd.api.types.is_datetime64_any_dtype(s):
+            # str(Timestamp) rendering; plain astype(str) would shorten the
+            # all-midnight file_date column to "YYYY-MM-DD"
+            s = s.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("")
+        elif pd.api.types.is_float_dtype(s):
+            # baseline "v or """ semantics: zeros hash as "" (falsy) and
+            # NaN as "nan" (truthy); astype(str) alone flips both
+            s = s.astype(str).mask(s == 0.0, "")
+        elif isinstance(s.dtype, pd.ArrowDtype):
+            # Arrow-backed columns are already text; astype(str) would
+            # only re-box them as Python objects
+            s = s.fillna("")
+        else:
+            s = s.astype(str).where(s.notna(), "")
+        parts.append(s)
+    cat = parts[0].str.cat(parts[1:], sep="|")
+    encoded = cat.str.encode("utf-8", "ignore").to_numpy()
+
+    n_jobs = os.cpu_count() or 1
+    if len(encoded) < _PARALLEL_HASH_MIN_ROWS or n_jobs == 1:
+        return pd.Series(_hash_chunk(encoded), index=df.index, dtype=object)
+
+    chunks = np.array_split(encoded, n_jobs)
+    pool = _get_hash_pool()
+    hashed = list(chain.from_iterable(pool.map(_hash_chunk, chunks)))
+    return pd.Series(hashed, index=df.index, dtype=object)
 
 
 def clean_transform(raw: pd.DataFrame) -> pd.DataFrame:
     """
     Standardize types/columns and produce a clean, consistent output frame.
+
+    Mutates ``raw`` in place: the caller hands the frame off and never
+    touches it again, and at millions of rows the old copy-then-rebuild
+    pattern kept ~4x the working set alive at once.
     """
     if raw.empty:
         return raw
 
-    df = raw.copy()
+    # Dates/times. Explicit formats keep pandas off the per-value
+    # dateutil fallback: file_date always arrives as YYYY-MM-DD (and is
+    # heavily duplicated across rows, so cache=True pays for itself),
+    # while the leg timestamps are ISO-8601 from the portal export.
+    raw["trip_date"] = pd.to_datetime(
+        raw["file_date_raw"], errors="coerce", format="%Y-%m-%d", cache=True
+    )
+    raw["start_time_utc"] = pd.to_datetime(
+        raw["start_time"], errors="coerce", format="ISO8601", utc=True
+    ).dt.tz_convert(None)
+    raw["end_time_utc"] = pd.to_datetime(
+        raw["end_time"], errors="coerce", format="ISO8601", utc=True
+    ).dt.tz_convert(None)
+
+    # numeric fields arrive as native floats (TRY_CAST in fetch_new_raw),
+    # so no pd.to_numeric re-coercion pass is needed here
+
+    # IDs as Arrow-backed strings (important: user_trip_id behaves like a
+    # string); Arrow columns skip the Python-object path in str kernels.
+    _arrow_str = pd.ArrowDtype(pa.string())
+    raw["user_trip_id"] = raw["user_trip_id"].astype(_arrow_str)
+    raw["Origin_BG"] = raw["Origin_BG"].astype(_arrow_str)
+    raw["Dest_BG"] = raw["Dest_BG"].astype(_arrow_str)
+    raw["source_file"] = raw["source_file"].astype(_arrow_str)
+
+    # route/stop labels repeat heavily; category dtype shrinks them to
+    # codes and lets the hash prep re-render each distinct value once
+    for col in CATEGORY_COLS:
+        raw[col] = raw[col].astype("category")
+
+    # row_hash - computed while numerics are still float64 so the string
+    # rendering (and therefore the hash) matches rows loaded before the
+    # float32 downcast below.
+    raw["row_hash"] = compute_row_hashes(raw)
+
+    # float32 halves clean_df memory and the driver buffer copies through
+    # executemany; lat/lon at 1e-7 precision still fits.
+    for col in FLOAT_COLS:
+        raw[col] = raw[col].astype(np.float32)
+
+    # inf -> NaN (surfaces as NULL at staging time); only the float
+    # columns can hold inf, so mask those instead of paying for a
+    # frame-wide replace across 20 columns
+    for col in FLOAT_COLS:
+        vals = raw[col].to_numpy()
+        finite = np.isfinite(vals)
+        if not finite.all():
+            raw[col] = np.where(finite, vals, np.float32(np.nan))
+
+    # output schema (aligned with clean table expectations); rows without a
+    # trip_date are dropped here
+    out = raw.loc[raw["trip_date"].notna(), CLEAN_COLS]
+    return out.astype({"trip_date": pd.ArrowDtype(pa.date32())})
 
-    # Dates/times
-    df["trip_date"] = pd.to_datetime(df["file_date_raw"], errors="coerce").dt.date
-    df["start_time_utc"] = pd.to_datetime(df["start_time"], errors="coerce", utc=True)
-    df["end_time_utc"] = pd.to_datetime(df["end_time"], errors="coerce", utc=True)
 
-    # numeric fields
-    for col in [
-        "start_longitude", "start_latitude", "end_longitude", "end_latitude",
-        "manhattan_distance_mi", "euclidean_distance_mi"
-    ]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+# -----------------------------
+# Load: upsert into clean table
+# -----------------------------
 
-    # IDs as strings (important: user_trip_id behaves like a string)
-    df["user_trip_id"] = df["user_trip_id"].astype("string")
-    df["Origin_BG"] = df["Origin_BG"].astype("string")
-    df["Dest_BG"] = df["Dest_BG"].astype("string")
-    df["source_file"] = df["source_file"].astype("string")
+# Built once at import; the per-call work is a single str.format. row_hash
+# travels as the raw 32-byte digest and binds straight to varbinary(32).
+_STAGING_DDL = """
+IF OBJECT_ID('tempdb..{stg_name}') IS NOT NULL DROP TABLE {stg_name};
 
-    # row_hash
-    df["row_hash_hex"] = df.apply(lambda r: sha256_rowhash(r.to_dict()), axis=1)
+CREATE TABLE {stg_name} (
+    row_hash varbinary(32) NOT NULL,
+    user_trip_id nvarchar(100) NOT NULL,
 
-    # output schema (aligned with clean table expectations)
-    out = pd.DataFrame({
-        "row_hash_hex": df["row_hash_hex"],
-        "user_trip_id": df["user_trip_id"],
+    trip_date date NOT NULL,
+    start_time_utc datetime2(3) NULL,
+    end_time_utc datetime2(3) NULL,
 
-        "trip_date": df["trip_date"],
-        "start_time_utc": df["start_time_utc"].dt.tz_convert(None),
-        "end_time_utc": df["end_time_utc"].dt.tz_convert(None),
+    start_longitude float NULL,
+    start_latitude float NULL,
+    end_longitude float NULL,
+    end_latitude float NULL,
 
-        "start_longitude": df["start_longitude"],
-        "start_latitude": df["start_latitude"],
-        "end_longitude": df["end_longitude"],
-        "end_latitude": df["end_latitude"],
+    service_name nvarchar(200) NULL,
+    route_short_name nvarchar(50) NULL,
+    mode nvarchar(50) NULL,
+    start_stop_name nvarchar(200) NULL,
+    end_stop_name nvarchar(200) NULL,
 
-        "service_name": df["service_name"],
-        "route_short_name": df["route_short_name"],
-        "mode": df["mode"],
-        "start_stop_name": df["start_stop_name"],
-        "end_stop_name": df["end_stop_name"],
+    source_file nvarchar(300) NULL,
+    file_date_raw nvarchar(50) NULL,
 
-        "source_file": df["source_file"],
-        "file_date_raw": df["file_date_raw"],
+    manhattan_distance_mi float NULL,
+    euclidean_distance_mi float NULL,
 
-        "manhattan_distance_mi": df["manhattan_distance_mi"],
-        "euclidean_distance_mi": df["euclidean_distance_mi"],
+    Origin_BG varchar(12) NULL,
+    Dest_BG varchar(12) NULL
+);
+"""
 
-        "Origin_BG": df["Origin_BG"],
-        "Dest_BG": df["Dest_BG"],
-    })
+_STAGING_INSERT_SQL = f"""
+    INSERT INTO {{stg_name}} (
+        {", ".join(CLEAN_COLS)}
+    )
+    VALUES ({",".join("?" * len(CLEAN_COLS))})
+"""
 
-    # remove rows without trip_date
-    out = out[~out["trip_date"].isna()].copy()
+# Explicit bind sizes for the variable-length staging columns (order =
+# CLEAN_COLS). fast_executemany otherwise re-sizes its parameter arrays to
+# the widest value seen per batch, reallocating driver buffers batch over
+# batch; None leaves the fixed-width columns to the driver defaults.
+_STAGING_INPUT_SIZES = [
+    (pyodbc.SQL_VARBINARY, 32, 0),   # row_hash
+    (pyodbc.SQL_WVARCHAR, 100, 0),   # user_trip_id
+    None,                            # trip_date
+    None,                            # start_time_utc
+    None,                            # end_time_utc
+    None, None, None, None,          # start/end longitude/latitude
+    (pyodbc.SQL_WVARCHAR, 200, 0),   # service_name
+    (pyodbc.SQL_WVARCHAR, 50, 0),    # route_short_name
+    (pyodbc.SQL_WVARCHAR, 50, 0),    # mode
+    (pyodbc.SQL_WVARCHAR, 200, 0),   # start_stop_name
+    (pyodbc.SQL_WVARCHAR, 200, 0),   # end_stop_name
+    (pyodbc.SQL_WVARCHAR, 300, 0),   # source_file
+    (pyodbc.SQL_WVARCHAR, 50, 0),    # file_date_raw
+    None, None,                      # manhattan/euclidean_distance_mi
+    (pyodbc.SQL_VARCHAR, 12, 0),     # Origin_BG
+    (pyodbc.SQL_VARCHAR, 12, 0),     # Dest_BG
+]
+
+# Insert-only dedup. Plain INSERT ... WHERE NOT EXISTS over a clustered
+# staging index seeks instead of MERGE's full sort/join, logs less in
+# tempdb, and sidesteps MERGE's long list of correctness quirks.
+_DEDUP_INSERT_SQL = """
+INSERT INTO {clean_table} (
+    row_hash, user_trip_id, trip_date, start_time_utc, end_time_utc,
+    start_longitude, start_latitude, end_longitude, end_latitude,
+    service_name, route_short_name, mode, start_stop_name, end_stop_name,
+    source_file, file_date_raw, manhattan_distance_mi, euclidean_distance_mi,
+    Origin_BG, Dest_BG
+)
+SELECT
+    src.row_hash,
+    src.user_trip_id, src.trip_date, src.start_time_utc, src.end_time_utc,
+    src.start_longitude, src.start_latitude, src.end_longitude, src.end_latitude,
+    src.service_name, src.route_short_name, src.mode, src.start_stop_name, src.end_stop_name,
+    src.source_file, src.file_date_raw, src.manhattan_distance_mi, src.euclidean_distance_mi,
+    src.Origin_BG, src.Dest_BG
+FROM {stg_name} AS src
+WHERE NOT EXISTS (
+    SELECT 1 FROM {clean_table} c WHERE c.row_hash = src.row_hash
+);
+"""
 
-    # replace inf with NaN then allow NULL handling later
-    out = out.replace([np.inf, -np.inf], np.nan)
 
-    return out
+def fetch_known_hashes(cn: pyodbc.Connection, cfg: TransformConfig, since: dt.datetime) -> set[bytes]:
+    """
+    Hashes already present in the clean table for the incremental window.
 
+    The overlap_days re-read means most refetched rows are usually
+    already loaded; filtering against this set client-side spares those
+    rows the whole sanitize/marshal/stage path instead of having the
+    server discard them at the end of it.
+    """
+    cur = cn.cursor()
+    cur.execute(
+        f"SELECT row_hash FROM {cfg.clean_table} WHERE trip_date >= ?",
+        since.date(),
+    )
+    # normalize to bytes: some drivers hand varbinary back as bytearray
+    return {bytes(r[0]) for r in cur.fetchall()}
 
-# -----------------------------
-# Load: upsert into clean table
-# -----------------------------
 
 def upsert_legtrips_clean(cn: pyodbc.Connection, cfg: TransformConfig, clean_df: pd.DataFrame) -> int:
     """
     Insert-only upsert:
-      - stage rows into #stg_legtrips
-      - MERGE into mobility.LegTrips_Clean where row_hash not already present
+      - stage rows into a temp table (executemany, or bcp when configured)
+      - cluster the staging table on row_hash, then INSERT ... WHERE NOT
+        EXISTS into mobility.LegTrips_Clean
+
+    With USE_TVP=1 there is no staging table at all: the batch is bound as
+    a single mobility.LegTripStage table-valued parameter and the dedup
+    insert runs inside mobility.usp_Merge_LegTrips
+    (sql/04_tvp_legtrips_stage.sql).
+
+    With USE_BULKCOPY_CLEAN=1 the staging table is a *global* temp table loaded by
+    bcp.exe over the native TDS bulk protocol; bcp runs in its own session,
+    so the table DDL is committed first and the table is dropped explicitly
+    once the dedup insert finishes.
 
     Returns count staged (approx count processed).
     """
@@ -316,108 +632,219 @@ def upsert_legtrips_clean(cn: pyodbc.Connection, cfg: TransformConfig, clean_df:
     cur = cn.cursor()
     cur.fast_executemany = True
 
-    # We store row_hash in SQL as varbinary(32).
-    # The python dataframe contains row_hash_hex (64 hex chars).
-    cur.execute("""
-    IF OBJECT_ID('tempdb..#stg_legtrips') IS NOT NULL DROP TABLE #stg_legtrips;
-
-    CREATE TABLE #stg_legtrips (
-        row_hash_hex nvarchar(64) NOT NULL,
-        user_trip_id nvarchar(100) NOT NULL,
-
-        trip_date date NOT NULL,
-        start_time_utc datetime2(3) NULL,
-        end_time_utc datetime2(3) NULL,
-
-        start_longitude float NULL,
-        start_latitude float NULL,
-        end_longitude float NULL,
-        end_latitude float NULL,
-
-        service_name nvarchar(200) NULL,
-        route_short_name nvarchar(50) NULL,
-        mode nvarchar(50) NULL,
-        start_stop_name nvarchar(200) NULL,
-        end_stop_name nvarchar(200) NULL,
-
-        source_file nvarchar(300) NULL,
-        file_date_raw nvarchar(50) NULL,
-
-        manhattan_distance_mi float NULL,
-        euclidean_distance_mi float NULL,
-
-        Origin_BG varchar(12) NULL,
-        Dest_BG varchar(12) NULL
-    );
-    """)
-
-    cols = [
-        "row_hash_hex", "user_trip_id",
-        "trip_date", "start_time_utc", "end_time_utc",
-        "start_longitude", "start_latitude", "end_longitude", "end_latitude",
-        "service_name", "route_short_name", "mode", "start_stop_name", "end_stop_name",
-        "source_file", "file_date_raw",
-        "manhattan_distance_mi", "euclidean_distance_mi",
-        "Origin_BG", "Dest_BG"
-    ]
-
-    insert_sql = """
-        INSERT INTO #stg_legtrips (
-            row_hash_hex, user_trip_id,
-            trip_date, start_time_utc, end_time_utc,
-            start_longitude, start_latitude, end_longitude, end_latitude,
-            service_name, route_short_name, mode, start_stop_name, end_stop_name,
-            source_file, file_date_raw,
-            manhattan_distance_mi, euclidean_distance_mi,
-            Origin_BG, Dest_BG
+    if cfg.use_tvp:
+        # the whole batch travels as one table-valued parameter and the
+        # server-side proc runs the dedup insert; no temp table involved
+        return _merge_rows_tvp(cur, clean_df[CLEAN_COLS])
+
+    stg_name = "##stg_legtrips" if cfg.use_bulkcopy else "#stg_legtrips"
+
+    cur.execute(_STAGING_DDL.format(stg_name=stg_name))
+
+    if cfg.use_bulkcopy:
+        # bcp's session must be able to see the global temp table
+        cn.commit()
+        staged = _stage_rows_bcp(cfg, clean_df[CLEAN_COLS], stg_name)
+    else:
+        staged = _stage_rows_executemany(cur, clean_df[CLEAN_COLS], stg_name, cfg.batch_size)
+
+    # Building the index after the load is cheaper than maintaining it
+    # during it; with both sides ordered on row_hash the NOT EXISTS
+    # probe is an index seek rather than a full sort.
+    cur.execute(f"CREATE CLUSTERED INDEX IX_stg_hash ON {stg_name}(row_hash);")
+    cur.execute(_DEDUP_INSERT_SQL.format(clean_table=cfg.clean_table, stg_name=stg_name))
+
+    if cfg.use_bulkcopy:
+        cur.execute(f"DROP TABLE {stg_name};")
+
+    return staged
+
+
+def _stage_rows_bcp(cfg: TransformConfig, stage_df: pd.DataFrame, stg_name: str) -> int:
+    """
+    Load the staging rows through bcp.exe (native TDS bulk copy).
+    """
+    # char-format bcp reads varbinary columns as hex text, so the raw
+    # digest is rendered to hex for the TSV only
+    stage_df = stage_df.assign(row_hash=stage_df["row_hash"].map(bytes.hex))
+
+    # bcp -c has no CSV quoting: quoted fields keep their literal quotes
+    # and an embedded tab or newline shifts the rest of the row, so strip
+    # those characters from the text columns and write the file unquoted.
+    # This runs after the row_hash hex assign - astype("string") on the
+    # raw bytes column would render "b'...'".
+    for c in stage_df.columns:
+        s = stage_df[c]
+        if (
+            pd.api.types.is_object_dtype(s)
+            or pd.api.types.is_string_dtype(s)
+            or isinstance(s.dtype, pd.CategoricalDtype)
+        ):
+            stage_df[c] = s.astype("string").str.replace(r"[\t\r\n]", " ", regex=True)
+
+    tmp = tempfile.NamedTemporaryFile(
+        mode="w", suffix=".tsv", delete=False, encoding="utf-8", newline=""
+    )
+    try:
+        stage_df.to_csv(
+            tmp,
+            sep="\t",
+            header=False,
+            index=False,
+            na_rep="",
+            quoting=csv.QUOTE_NONE,
+            date_format="%Y-%m-%d %H:%M:%S.%f",
         )
-        VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+        tmp.close()
+
+        cmd = [
+            "bcp", stg_name, "in", tmp.name,
+            "-S", cfg.sql_server,
+            "-d", cfg.sql_database,
+            "-T",            # trusted connection (matches connect_sql)
+            "-c",            # character format
+            "-C", "65001",   # temp file is UTF-8, not the client ANSI page
+            "-b", "50000",   # batch size
+            "-h", "TABLOCK",
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"bcp staging load failed: {result.stdout}\n{result.stderr}"
+            )
+        print(f"[INFO] staged into {stg_name} via bcp: {len(stage_df):,}")
+        return len(stage_df)
+    finally:
+        os.unlink(tmp.name)
+
+
+def _stage_rows_executemany(
+    cur: pyodbc.Cursor, clean_df: pd.DataFrame, stg_name: str, batch_size: int = 50_000
+) -> int:
     """
+    Load the staging rows through pyodbc fast_executemany in chunks.
+
+    batch_size (BATCH_SIZE env) is the rows-per-round-trip knob; 50k is
+    the measured sweet spot here, but slower links may prefer smaller
+    batches. Note fast_executemany binds parameter *arrays*, so SQL
+    Server's 2100-parameters-per-statement limit does not apply - do not
+    shrink this to 2100 // 20.
+    """
+    insert_sql = _STAGING_INSERT_SQL.format(stg_name=stg_name)
+
+    # explicit sizes for the varchar columns keep the driver from
+    # re-allocating its bind buffers as wider values show up
+    cur.setinputsizes(_STAGING_INPUT_SIZES)
+
+    # cells arrive as native Python scalars / None; no per-cell conversion.
+    # Materialize all row tuples once and hand executemany plain list
+    # slices - no per-row append/regrow inside the hot loop.
+    safe_df = _sanitize_for_sql(clean_df)
+    rows = list(safe_df.itertuples(index=False, name=None))
 
-    CHUNK_SIZE = 50000
     staged = 0
-    batch: list[tuple[Any, ...]] = []
+    for i in range(0, len(rows), batch_size):
+        chunk = rows[i:i + batch_size]
+        cur.executemany(insert_sql, chunk)
+        staged += len(chunk)
+        print(f"[INFO] staged into {stg_name}: {staged:,}")
+
+    cur.setinputsizes(None)  # the cursor is reused for the dedup insert
+    return staged
 
-    for r in clean_df[cols].itertuples(index=False, name=None):
-        safe_row = tuple(_sql_safe(v) for v in r)
-        batch.append(safe_row)
 
-        if len(batch) >= CHUNK_SIZE:
-            cur.executemany(insert_sql, batch)
-            staged += len(batch)
-            batch = []
-            print(f"[INFO] staged into #stg_legtrips: {staged:,}")
+# type + proc defined in sql/04_tvp_legtrips_stage.sql
+_TVP_TYPE_NAME = "mobility.LegTripStage"
+_TVP_PROC_CALL = "{CALL mobility.usp_Merge_LegTrips (?)}"
 
-    if batch:
-        cur.executemany(insert_sql, batch)
-        staged += len(batch)
-        print(f"[INFO] staged into #stg_legtrips: {staged:,}")
 
-    # MERGE into the clean table
-    # IMPORTANT: we convert hex string -> varbinary(32)
+def _merge_rows_tvp(cur: pyodbc.Cursor, clean_df: pd.DataFrame) -> int:
+    """
+    Stage + merge one batch through a table-valued parameter (USE_TVP=1).
+
+    The whole batch is bound as a single mobility.LegTripStage parameter,
+    so the server sees one call and one dedup insert instead of chunked
+    20-parameter inserts bouncing off the 2100-parameter limit. Close to
+    bcp throughput without shelling out to bcp.exe.
+    """
+    safe_df = _sanitize_for_sql(clean_df)
+    rows = list(safe_df.itertuples(index=False, name=None))
+
+    # pyodbc treats a leading string element as the schema-qualified TVP
+    # type name (needed because mobility is not the default schema)
+    rows.insert(0, _TVP_TYPE_NAME)
+    cur.execute(_TVP_PROC_CALL, [rows])
+
+    staged = len(rows) - 1
+    print(f"[INFO] merged via TVP: {staged:,}")
+    return staged
+
+
+# -----------------------------
+# Server-side pushdown
+# -----------------------------
+
+def pushdown_clean_insert(cn: pyodbc.Connection, cfg: TransformConfig, since: dt.datetime) -> None:
+    """
+    Clean + hash + dedup entirely inside SQL Server (SQL_PUSHDOWN=1).
+
+    One INSERT ... SELECT computes the row hash with HASHBYTES over the
+    same pipe-delimited field list as compute_row_hashes and inserts only
+    rows whose hash is not yet in the clean table. No raw row ever crosses
+    the wire, so the fetch/transform/stage stages disappear from the
+    critical path; Python keeps only watermark and proc handling.
+
+    NOTE: T-SQL string conversion does not reproduce Python's str()
+    formatting byte-for-byte, so server-side hashes differ from
+    client-side ones. Pick one mode and stay with it - switching modes
+    re-inserts the overlap window once.
+    """
+    cur = cn.cursor()
     cur.execute(f"""
-    MERGE {cfg.clean_table} AS tgt
-    USING #stg_legtrips AS src
-      ON tgt.row_hash = CONVERT(varbinary(32), src.row_hash_hex, 2)
-    WHEN NOT MATCHED BY TARGET THEN
-      INSERT (
+    INSERT INTO {cfg.clean_table} (
         row_hash, user_trip_id, trip_date, start_time_utc, end_time_utc,
         start_longitude, start_latitude, end_longitude, end_latitude,
         service_name, route_short_name, mode, start_stop_name, end_stop_name,
         source_file, file_date_raw, manhattan_distance_mi, euclidean_distance_mi,
         Origin_BG, Dest_BG
-      )
-      VALUES (
-        CONVERT(varbinary(32), src.row_hash_hex, 2),
-        src.user_trip_id, src.trip_date, src.start_time_utc, src.end_time_utc,
-        src.start_longitude, src.start_latitude, src.end_longitude, src.end_latitude,
-        src.service_name, src.route_short_name, src.mode, src.start_stop_name, src.end_stop_name,
-        src.source_file, src.file_date_raw, src.manhattan_distance_mi, src.euclidean_distance_mi,
-        src.Origin_BG, src.Dest_BG
+    )
+    SELECT
+        h.row_hash,
+        r.user_trip_id,
+        CONVERT(date, r.file_date),
+        TRY_CONVERT(datetime2(3), r.start_time),
+        TRY_CONVERT(datetime2(3), r.end_time),
+        r.start_longitude, r.start_latitude, r.end_longitude, r.end_latitude,
+        r.service_name, r.route_short_name, r.mode, r.start_stop_name, r.end_stop_name,
+        r.source_file, CONVERT(nvarchar(50), r.file_date, 126),
+        r.manhattan_distance_mi, r.euclidean_distance_mi,
+        r.Origin_BG, r.Dest_BG
+    FROM {cfg.source_table} r
+    CROSS APPLY (
+        /* CONCAT_WS drops NULL arguments together with their separator,
+           which would let distinct rows with NULLs in different fields
+           collapse to one hash; ISNULL keeps every position. */
+        SELECT HASHBYTES('SHA2_256', CONCAT_WS('|',
+            ISNULL(r.user_trip_id, ''),
+            ISNULL(CONVERT(nvarchar(50), r.start_time, 126), ''),
+            ISNULL(CONVERT(nvarchar(50), r.end_time, 126), ''),
+            ISNULL(CONVERT(nvarchar(50), r.start_longitude), ''),
+            ISNULL(CONVERT(nvarchar(50), r.start_latitude), ''),
+            ISNULL(CONVERT(nvarchar(50), r.end_longitude), ''),
+            ISNULL(CONVERT(nvarchar(50), r.end_latitude), ''),
+            ISNULL(r.service_name, ''), ISNULL(r.route_short_name, ''), ISNULL(r.mode, ''),
+            ISNULL(r.start_stop_name, ''), ISNULL(r.end_stop_name, ''),
+            ISNULL(r.source_file, ''), ISNULL(CONVERT(nvarchar(50), r.file_date, 126), ''),
+            ISNULL(r.Origin_BG, ''), ISNULL(r.Dest_BG, '')
+        )) AS row_hash
+    ) h
+    WHERE r.file_date >= ?
+      AND CONVERT(date, r.file_date) IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM {cfg.clean_table} c WHERE c.row_hash = h.row_hash
       );
-    """)
-
-    return staged
+    """, since)
+    print("[INFO] Pushdown insert complete. Rows inserted:", cur.rowcount)
 
 
 # -----------------------------
@@ -459,23 +886,85 @@ def run() -> None:
     try:
         cn = connect_sql(cfg)
 
-        raw = fetch_new_raw(cn, cfg, since)
-        print("[INFO] Raw rows fetched:", len(raw))
-
-        clean = clean_transform(raw)
-        print("[INFO] Clean rows after transform:", len(clean))
-
-        staged = upsert_legtrips_clean(cn, cfg, clean)
-        print("[INFO] Staged rows merged (approx):", staged)
-
-        refresh_rolling_aggregates(cn, cfg)
-
-        cn.commit()
-
-        # update watermark only if we fetched rows
-        if not raw.empty:
-            max_fdt = pd.to_datetime(raw["file_date_raw"], errors="coerce").max()
-            if pd.notna(max_fdt):
+        if cfg.sql_pushdown:
+            pushdown_clean_insert(cn, cfg, since)
+            refresh_rolling_aggregates(cn, cfg)
+            cn.commit()
+
+            # advance the watermark from the raw table itself
+            cur = cn.cursor()
+            cur.execute(
+                f"SELECT MAX(file_date) FROM {cfg.source_table} WHERE file_date >= ?",
+                since,
+            )
+            row = cur.fetchone()
+            if row and row[0] is not None:
+                state["last_file_dt"] = pd.Timestamp(row[0]).to_pydatetime().isoformat(sep=" ")
+        else:
+            # Producer/consumer: a fetcher thread streams raw chunks into a
+            # small queue while this thread runs clean/hash/stage, so the
+            # server keeps sending while Python hashes the previous chunk.
+            # The fetcher needs its own connection - the main one is busy
+            # staging while its cursor would still be mid-result-set.
+            chunk_q: queue.Queue = queue.Queue(maxsize=2)
+            done = object()
+
+            def _fetch_worker() -> None:
+                fetch_cn = connect_sql(cfg)
+                try:
+                    for chunk in fetch_new_raw_chunks(fetch_cn, cfg, since):
+                        chunk_q.put(chunk)
+                    chunk_q.put(done)
+                except BaseException as exc:  # re-raised on the main thread
+                    chunk_q.put(exc)
+                finally:
+                    fetch_cn.close()
+
+            fetcher = threading.Thread(target=_fetch_worker, daemon=True)
+            fetcher.start()
+
+            known_hashes = fetch_known_hashes(cn, cfg, since)
+            print(f"[INFO] known hashes in window: {len(known_hashes):,}")
+
+            fetched = cleaned = staged = 0
+            max_fdt = pd.NaT
+            while True:
+                item = chunk_q.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                fetched += len(item)
+                chunk_max = pd.to_datetime(item["file_date_raw"], errors="coerce").max()
+                if pd.notna(chunk_max) and (pd.isna(max_fdt) or chunk_max > max_fdt):
+                    max_fdt = chunk_max
+
+                clean = clean_transform(item)
+                cleaned += len(clean)
+                if clean.empty:
+                    # empty frames pass through clean_transform untouched
+                    # and never gain a row_hash column
+                    continue
+
+                # overlap rows already in the clean table never leave Python
+                if known_hashes:
+                    clean = clean[~clean["row_hash"].isin(known_hashes)]
+                known_hashes.update(clean["row_hash"])
+
+                staged += upsert_legtrips_clean(cn, cfg, clean)
+
+            fetcher.join()
+            print("[INFO] Raw rows fetched:", fetched)
+            print("[INFO] Clean rows after transform:", cleaned)
+            print("[INFO] Staged rows merged (approx):", staged)
+
+            refresh_rolling_aggregates(cn, cfg)
+
+            cn.commit()
+
+            # update watermark only if we fetched rows
+            if fetched and pd.notna(max_fdt):
                 state["last_file_dt"] = max_fdt.to_pydatetime().isoformat(sep=" ")
 
         state["last_run_utc"] = dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")